@@ -1,6 +1,11 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+import asyncio
+import functools
+import json
 import os
 import logging
 from typing import Optional, List
@@ -8,23 +13,56 @@ from typing import Optional, List
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="tstgen API")
+# orjson encodes the 10-50 KB generate payloads several times faster than
+# stdlib json and emits UTF-8 bytes directly
+app = FastAPI(title="tstgen API", default_response_class=ORJSONResponse)
 
-try:
-    from tstgen.generator import (
-        generate_testcases,
-        generate_selenium_script,
-        generate_playwright_script,
-        format_testcases_as_markdown,
-    )
-    from tstgen.llm_client import LLMClient
-except Exception as e:
-    # If imports fail, we'll still allow mock operation
-    generate_testcases = None
-    generate_selenium_script = None
-    generate_playwright_script = None
-    format_testcases_as_markdown = None
-    LLMClient = None
+# Generated Markdown + scripts are often >10 KB; gzip saves most of the wire bytes
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# generator no longer drags in the OpenAI SDK, so these are cheap; the heavy
+# tstgen.llm_client import is deferred to get_llm_client() to keep cold-start
+# fast for mock-only deployments
+from tstgen.generator import (
+    agenerate_all,
+    format_testcases_as_markdown,
+    make_testcase_messages,
+)
+
+
+# Mock fallback payloads, built once; handlers only read them
+_MOCK_TESTCASES = {
+    "positive_cases": [
+        {
+            "id": "TC-1",
+            "title": "Basic happy path",
+            "preconditions": "User logged in",
+            "steps": ["Navigate to feature", "Perform action", "Verify result"],
+            "expected_result": "Action completes successfully",
+        }
+    ],
+    "negative_cases": [
+        {
+            "id": "TC-N1",
+            "title": "Invalid input triggers validation",
+            "preconditions": "User logged in",
+            "steps": ["Enter invalid data", "Submit form"],
+            "expected_result": "Error message displayed",
+        }
+    ],
+    "edge_cases": [
+        {
+            "id": "TC-E1",
+            "title": "Boundary value at limit",
+            "preconditions": "User logged in",
+            "steps": ["Enter max value", "Submit"],
+            "expected_result": "Accepted or error shown",
+        }
+    ],
+    "test_data": {"example_input": "test_value", "boundary_values": ["min", "max"]},
+}
+_MOCK_SELENIUM = "# Mock selenium script\nprint('selenium mock')\n"
+_MOCK_PLAYWRIGHT = "# Mock playwright script\nprint('playwright mock')\n"
 
 
 class GenerateRequest(BaseModel):
@@ -36,39 +74,73 @@ class GenerateRequest(BaseModel):
     structured_json: Optional[bool] = True
 
 
-# Global LLM client instance (shared across requests for cache efficiency)
-_llm_client = None
+# Shared across requests for cache and connection-pool efficiency
+@functools.lru_cache(maxsize=1)
+def _build_llm_client():
+    from tstgen.llm_client import LLMClient
+
+    return LLMClient(cache_enabled=True)
 
 
 def get_llm_client():
-    """Get or create a shared LLM client."""
-    global _llm_client
-    if _llm_client is None:
-        try:
-            _llm_client = LLMClient(cache_enabled=True)
-        except Exception:
-            pass
-    return _llm_client
+    """Get or create the shared LLM client, or None if construction fails.
+
+    lru_cache doesn't memoize calls that raise, so a transient failure
+    (missing key, disk error) is retried on the next request instead of
+    pinning the server in mock mode.
+    """
+    try:
+        return _build_llm_client()
+    except Exception:
+        return None
+
+
+@app.on_event("startup")
+async def warm_llm_client():
+    """Construct the client once at startup so the first request doesn't pay for it."""
+    get_llm_client()
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    """Release the client's pooled HTTP connections."""
+    llm = get_llm_client()
+    if llm:
+        await llm.aclose()
+
+
+def _read_snippet(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read(1000)
+    except Exception:
+        return ""
 
 
-def _load_history(query: str, limit: int = 5) -> List[dict]:
+async def _load_history(query: str, limit: int = 5) -> List[dict]:
     outdir = os.path.join(os.getcwd(), "outputs")
-    results = []
     if not os.path.isdir(outdir):
-        return results
-    for fname in os.listdir(outdir)[:limit]:
-        path = os.path.join(outdir, fname)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                text = f.read(1000)
-        except Exception:
-            text = ""
-        results.append({"file": fname, "snippet": text})
-    return results
+        return []
+    # scandir avoids materializing the full directory listing and gives us
+    # entry paths without an os.path.join per file
+    entries = []
+    with os.scandir(outdir) as it:
+        for i, entry in enumerate(it):
+            if i >= limit:
+                break
+            entries.append((entry.name, entry.path))
+    # Overlap the blocking file reads instead of serializing them on the loop
+    snippets = await asyncio.gather(
+        *(asyncio.to_thread(_read_snippet, path) for _, path in entries)
+    )
+    return [
+        {"file": name, "snippet": text}
+        for (name, _), text in zip(entries, snippets)
+    ]
 
 
-@app.post("/api/generate")
-def api_generate(req: GenerateRequest):
+async def _generate_one(req: GenerateRequest) -> dict:
+    """Run the full generation pipeline for a single issue request."""
     issue = {"key": req.key or "ISSUE-1", "summary": req.summary, "description": req.description}
 
     # Decide whether to use LLM or mock
@@ -77,7 +149,7 @@ def api_generate(req: GenerateRequest):
     selenium_py = ""
     playwright_py = ""
 
-    use_mock = req.mock or os.getenv("OPENAI_API_KEY") is None or LLMClient is None
+    use_mock = req.mock or os.getenv("OPENAI_API_KEY") is None
 
     if not use_mock:
         try:
@@ -85,53 +157,23 @@ def api_generate(req: GenerateRequest):
             if llm is None:
                 use_mock = True
             else:
-                # Generate structured test cases
-                testcases_dict = generate_testcases(
-                    issue, llm, use_json=req.structured_json
-                )
-                testcases_markdown = format_testcases_as_markdown(testcases_dict)
-                selenium_py = generate_selenium_script(issue, testcases_markdown)
-                playwright_py = generate_playwright_script(issue, testcases_markdown)
+                # One LLM round-trip produces the whole artifact bundle
+                bundle = await agenerate_all(issue, llm, use_json=req.structured_json)
+                testcases_dict = bundle["testcases"]
+                testcases_markdown = bundle["markdown"]
+                selenium_py = bundle["selenium"]
+                playwright_py = bundle["playwright"]
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
     if use_mock:
         # Basic mock output if LLM unavailable
-        testcases_dict = {
-            "positive_cases": [
-                {
-                    "id": "TC-1",
-                    "title": "Basic happy path",
-                    "preconditions": "User logged in",
-                    "steps": ["Navigate to feature", "Perform action", "Verify result"],
-                    "expected_result": "Action completes successfully",
-                }
-            ],
-            "negative_cases": [
-                {
-                    "id": "TC-N1",
-                    "title": "Invalid input triggers validation",
-                    "preconditions": "User logged in",
-                    "steps": ["Enter invalid data", "Submit form"],
-                    "expected_result": "Error message displayed",
-                }
-            ],
-            "edge_cases": [
-                {
-                    "id": "TC-E1",
-                    "title": "Boundary value at limit",
-                    "preconditions": "User logged in",
-                    "steps": ["Enter max value", "Submit"],
-                    "expected_result": "Accepted or error shown",
-                }
-            ],
-            "test_data": {"example_input": "test_value", "boundary_values": ["min", "max"]},
-        }
+        testcases_dict = _MOCK_TESTCASES
         testcases_markdown = format_testcases_as_markdown(testcases_dict)
-        selenium_py = "# Mock selenium script\nprint('selenium mock')\n"
-        playwright_py = "# Mock playwright script\nprint('playwright mock')\n"
+        selenium_py = _MOCK_SELENIUM
+        playwright_py = _MOCK_PLAYWRIGHT
 
-    history = _load_history(req.summary if req.use_history else "") if req.use_history else []
+    history = await _load_history(req.summary) if req.use_history else []
 
     # Get rate limit status if LLM is available
     rate_limit_status = None
@@ -151,8 +193,62 @@ def api_generate(req: GenerateRequest):
     }
 
 
+@app.post("/api/generate")
+async def api_generate(req: GenerateRequest):
+    return await _generate_one(req)
+
+
+@app.post("/api/generate/batch")
+async def api_generate_batch(reqs: List[GenerateRequest]):
+    """Generate test cases for many issues concurrently.
+
+    Items fan out with asyncio.gather; the LLM client's semaphore keeps
+    the parallelism within provider rate limits. Failures are reported
+    per item instead of failing the whole batch.
+    """
+    results = await asyncio.gather(
+        *(_generate_one(r) for r in reqs), return_exceptions=True
+    )
+    items = []
+    for r, res in zip(reqs, results):
+        if isinstance(res, Exception):
+            detail = res.detail if isinstance(res, HTTPException) else str(res)
+            items.append({"key": r.key, "summary": r.summary, "error": detail})
+        else:
+            items.append(res)
+    return {"count": len(items), "results": items}
+
+
+@app.post("/api/generate/stream")
+async def api_generate_stream(req: GenerateRequest):
+    """Stream raw LLM output for an issue as server-sent events.
+
+    Clients see the first tokens in a few hundred milliseconds instead of
+    waiting for the full completion to buffer.
+    """
+    if req.mock or os.getenv("OPENAI_API_KEY") is None:
+        raise HTTPException(status_code=503, detail="LLM not available for streaming")
+
+    llm = get_llm_client()
+    if llm is None:
+        raise HTTPException(status_code=503, detail="LLM not available for streaming")
+
+    issue = {"key": req.key or "ISSUE-1", "summary": req.summary, "description": req.description}
+    system, payload = make_testcase_messages(issue, use_json=req.structured_json)
+
+    async def event_stream():
+        # JSON-frame each token so newlines in deltas can't break SSE parsing
+        async for delta in llm.astream(
+            payload, max_tokens=3000, structured_json=req.structured_json, system=system
+        ):
+            yield f"data: {json.dumps({'token': delta})}\n\n"
+        yield f"data: {json.dumps({'done': True})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.get("/api/status")
-def api_status():
+async def api_status():
     """Get current API status including rate limits and cache info."""
     llm = get_llm_client()
     if not llm:
@@ -165,7 +261,7 @@ def api_status():
 
 
 @app.post("/api/clear-cache")
-def api_clear_cache():
+async def api_clear_cache():
     """Clear the LLM response cache."""
     llm = get_llm_client()
     if llm:
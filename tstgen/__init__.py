@@ -1 +1,7 @@
-from .cli import main
+# Lazy re-export: importing tstgen submodules (e.g. tstgen.generator for
+# mock-only serving) shouldn't pay for the CLI's heavy dependency imports.
+def __getattr__(name):
+    if name == "main":
+        from .cli import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
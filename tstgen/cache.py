@@ -1,68 +1,169 @@
-import os
-import json
 import hashlib
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard  # shrinks stored responses ~10x; optional
+except ImportError:
+    zstandard = None
+
+# zstd frame magic; lets us tell compressed payloads from plain ones
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional
+
+
+class _L1Entry:
+    """Lightweight in-memory cache entry."""
+
+    __slots__ = ("response", "cached_at")
+
+    def __init__(self, response: str, cached_at: float):
+        self.response = response
+        self.cached_at = cached_at
 
 
 class ResponseCache:
-    """Simple file-based cache for LLM responses with TTL support."""
+    """SQLite-backed cache for LLM responses with TTL support.
 
-    def __init__(self, cache_dir: str = ".cache", ttl_hours: int = 24):
+    All entries live in a single WAL-mode database, so lookups are one
+    indexed query instead of a stat + open + parse per prompt, and
+    clear() is one DELETE rather than O(N) unlinks. A small in-memory
+    LRU sits in front so repeated hits on the same prompt skip SQLite
+    entirely.
+    """
+
+    def __init__(self, cache_dir: str = ".cache", ttl_hours: int = 24, l1_max_entries: int = 256):
         self.cache_dir = Path(cache_dir)
-        self.ttl = timedelta(hours=ttl_hours)
-        self.cache_dir.mkdir(exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_hours * 3600
+        self._l1: "OrderedDict[str, _L1Entry]" = OrderedDict()
+        self._l1_max = l1_max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.cache_dir / "cache.db", isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "hash TEXT PRIMARY KEY, model TEXT, response TEXT, ts REAL)"
+        )
+        # Reads filter expired rows out but nothing else deletes them, so
+        # purge anything past the TTL here to keep the db from growing
+        # without bound as prompts churn
+        self._db.execute(
+            "DELETE FROM cache WHERE ts <= ?", (time.time() - self.ttl_seconds,)
+        )
+        if zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(level=3)
+            self._decompressor = zstandard.ZstdDecompressor()
+        else:
+            self._compressor = self._decompressor = None
 
     def _hash_prompt(self, prompt: str, model: str) -> str:
-        """Create a deterministic hash of the prompt and model."""
+        """Create a deterministic hash of the prompt and model.
+
+        BLAKE2b is ~2x faster than SHA-256 on the short strings we key by.
+        """
         content = f"{model}:{prompt}"
-        return hashlib.sha256(content.encode()).hexdigest()
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=32).hexdigest()
+
+    def _l1_store(self, key: str, response: str, cached_at: float) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entry if full.
 
-    def _get_cache_path(self, prompt: str, model: str) -> Path:
-        """Get the cache file path for a prompt."""
-        fname = self._hash_prompt(prompt, model)
-        return self.cache_dir / f"{fname}.json"
+        Runs under the lock: sync callers come in from asyncio.to_thread
+        worker threads, and concurrent OrderedDict reordering/eviction can
+        raise KeyError or corrupt the LRU order.
+        """
+        with self._lock:
+            self._l1[key] = _L1Entry(response, cached_at)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max:
+                self._l1.popitem(last=False)
 
     def get(self, prompt: str, model: str) -> Optional[str]:
         """Retrieve cached response if it exists and hasn't expired."""
-        path = self._get_cache_path(prompt, model)
-        if not path.exists():
-            return None
+        return self.get_by_key(self._hash_prompt(prompt, model))
 
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+    def get_by_key(self, key: str) -> Optional[str]:
+        """Like `get`, but for callers that precompute the key digest."""
+        now = time.time()
 
-            # Check TTL
-            cached_at = datetime.fromisoformat(data.get("timestamp"))
-            if datetime.now() - cached_at > self.ttl:
-                path.unlink()  # Delete expired cache
-                return None
+        # In-memory hit first; mutations stay under the lock (see _l1_store)
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None:
+                if now - entry.cached_at > self.ttl_seconds:
+                    del self._l1[key]
+                    entry = None
+                else:
+                    self._l1.move_to_end(key)
+        if entry is not None:
+            return entry.response
 
-            return data.get("response")
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT response, ts FROM cache WHERE hash = ? AND ts > ?",
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+            if row is None:
+                return None
+            payload, ts = row
+            response = self._decode_payload(payload)
+            if response is None:
+                return None
+            self._l1_store(key, response, ts)
+            return response
         except Exception:
             return None
 
+    def _decode_payload(self, payload) -> Optional[str]:
+        """Decode a stored response; handles compressed and plain entries."""
+        if isinstance(payload, str):
+            return payload
+        if payload.startswith(_ZSTD_MAGIC):
+            if self._decompressor is None:
+                return None  # written with zstd, but it isn't installed now
+            with self._lock:
+                payload = self._decompressor.decompress(payload)
+        return payload.decode("utf-8")
+
     def set(self, prompt: str, model: str, response: str) -> None:
         """Store a response in cache with timestamp."""
-        path = self._get_cache_path(prompt, model)
+        self.set_by_key(self._hash_prompt(prompt, model), model, response)
+
+    def set_by_key(self, key: str, model: str, response: str) -> None:
+        """Like `set`, but for callers that precompute the key digest."""
+        now = time.time()
+        self._l1_store(key, response, now)
         try:
-            data = {
-                "prompt_hash": self._hash_prompt(prompt, model),
-                "model": model,
-                "response": response,
-                "timestamp": datetime.now().isoformat(),
-            }
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            with self._lock:
+                payload = response.encode("utf-8")
+                if self._compressor is not None:
+                    payload = self._compressor.compress(payload)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (hash, model, response, ts) VALUES (?, ?, ?, ?)",
+                    (key, model, payload, now),
+                )
         except Exception:
             pass  # Silent fail on cache write
 
     def clear(self) -> None:
         """Clear all cache entries."""
-        for f in self.cache_dir.glob("*.json"):
-            try:
-                f.unlink()
-            except Exception:
-                pass
+        try:
+            with self._lock:
+                self._l1.clear()
+                self._db.execute("DELETE FROM cache")
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        try:
+            self._db.close()
+        except Exception:
+            pass
@@ -5,7 +5,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 from .jira_client import fetch_issue
 from .llm_client import LLMClient
-from .generator import generate_testcases, generate_selenium_script, generate_playwright_script, format_testcases_as_markdown
+from .generator import generate_all, generate_selenium_script, generate_playwright_script, format_testcases_as_markdown
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,8 +39,11 @@ def main(argv=None):
 
     print("Generating test cases via LLM...")
     if llm and not use_mock:
-        testcases_dict = generate_testcases(issue, llm, use_json=True)
-        testcases_md = format_testcases_as_markdown(testcases_dict)
+        # Single LLM round-trip; skeletons come along in the same bundle
+        bundle = generate_all(issue, llm, use_json=True)
+        testcases_md = bundle["markdown"]
+        selenium_code = bundle["selenium"]
+        playwright_code = bundle["playwright"]
     else:
         # Mock output
         testcases_dict = {
@@ -58,6 +61,8 @@ def main(argv=None):
             "test_data": {},
         }
         testcases_md = format_testcases_as_markdown(testcases_dict)
+        selenium_code = generate_selenium_script(issue, testcases_md)
+        playwright_code = generate_playwright_script(issue, testcases_md)
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     base = OUTPUT_DIR / issue_key
@@ -69,10 +74,7 @@ def main(argv=None):
 
     print(f"Generated testcases -> {md_file}")
 
-    print("Generating automation skeletons...")
-    selenium_code = generate_selenium_script(issue, testcases_md)
-    playwright_code = generate_playwright_script(issue, testcases_md)
-
+    print("Writing automation skeletons...")
     (base.with_suffix('.selenium.py')).write_text(selenium_code, encoding='utf-8')
     (base.with_suffix('.playwright.py')).write_text(playwright_code, encoding='utf-8')
 
@@ -1,61 +1,103 @@
+from __future__ import annotations
+
 import json
-from typing import Dict, List, Optional
-from .llm_client import LLMClient
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .llm_client import LLMClient
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Static instruction blocks, built once at import; only the issue payload
+# varies. Sent as a leading system message so the provider's prefix cache
+# can reuse them across calls (make_testcase_prompt still appends them for
+# callers that want one combined string).
+_JSON_TAIL = (
+    "Generate comprehensive test cases with positive, negative, and edge cases. "
+    "Return ONLY valid JSON (no markdown) with this structure:\n"
+    "{\n"
+    "  \"positive_cases\": [\n"
+    "    {\"id\": \"TC-1\", \"title\": \"...\", \"preconditions\": \"...\", "
+    "\"steps\": [\"step1\", \"step2\"], \"expected_result\": \"...\"}\n"
+    "  ],\n"
+    "  \"negative_cases\": [\n"
+    "    {\"id\": \"TC-N1\", \"title\": \"...\", \"preconditions\": \"...\", "
+    "\"steps\": [...], \"expected_result\": \"...\"}\n"
+    "  ],\n"
+    "  \"edge_cases\": [\n"
+    "    {\"id\": \"TC-E1\", \"title\": \"...\", \"preconditions\": \"...\", "
+    "\"steps\": [...], \"expected_result\": \"...\"}\n"
+    "  ],\n"
+    "  \"test_data\": {\"example_input\": \"...\", \"boundary_values\": []}\n"
+    "}"
+)
+_MARKDOWN_TAIL = (
+    "Given the above requirement, produce a set of structured test cases. "
+    "For each test case provide: id, title, preconditions, steps (ordered), expected result, and example test data. "
+    "Return output in Markdown with clear headings for Positive, Negative, and Edge Cases."
+)
 
 
 def make_testcase_prompt(issue: Dict, use_json: bool = True) -> str:
     """Create a prompt for test case generation with optional JSON structure."""
+    return _make_testcase_prompt(
+        issue.get("key"), issue.get("summary"), issue.get("description"), use_json
+    )
+
+
+@lru_cache(maxsize=512)
+def _make_testcase_prompt(
+    key: Optional[str], summary: Optional[str], description: Optional[str], use_json: bool
+) -> str:
+    """Memoized prompt builder; issue keys repeat heavily across CI reruns."""
     base = (
-        f"Requirement key: {issue.get('key')}\n"
-        f"Summary: {issue.get('summary')}\n"
-        f"Description: {issue.get('description')}\n\n"
+        f"Requirement key: {key}\n"
+        f"Summary: {summary}\n"
+        f"Description: {description}\n\n"
     )
-    
-    if use_json:
-        return (
-            base +
-            "Generate comprehensive test cases with positive, negative, and edge cases. "
-            "Return ONLY valid JSON (no markdown) with this structure:\n"
-            "{\n"
-            "  \"positive_cases\": [\n"
-            "    {\"id\": \"TC-1\", \"title\": \"...\", \"preconditions\": \"...\", "
-            "\"steps\": [\"step1\", \"step2\"], \"expected_result\": \"...\"}\n"
-            "  ],\n"
-            "  \"negative_cases\": [\n"
-            "    {\"id\": \"TC-N1\", \"title\": \"...\", \"preconditions\": \"...\", "
-            "\"steps\": [...], \"expected_result\": \"...\"}\n"
-            "  ],\n"
-            "  \"edge_cases\": [\n"
-            "    {\"id\": \"TC-E1\", \"title\": \"...\", \"preconditions\": \"...\", "
-            "\"steps\": [...], \"expected_result\": \"...\"}\n"
-            "  ],\n"
-            "  \"test_data\": {\"example_input\": \"...\", \"boundary_values\": []}\n"
-            "}"
-        )
-    else:
-        return (
-            base +
-            "Given the above requirement, produce a set of structured test cases. "
-            "For each test case provide: id, title, preconditions, steps (ordered), expected result, and example test data. "
-            "Return output in Markdown with clear headings for Positive, Negative, and Edge Cases."
-        )
+    return base + (_JSON_TAIL if use_json else _MARKDOWN_TAIL)
 
 
-def generate_testcases(issue: Dict, llm: LLMClient, use_json: bool = True) -> Dict:
-    """Generate test cases, optionally as structured JSON.
-    
-    Returns:
-        If use_json=True: dict with keys 'positive_cases', 'negative_cases', 'edge_cases', 'test_data'
-        If use_json=False: dict with key 'markdown' containing markdown text
+def make_testcase_messages(issue: Dict, use_json: bool = True) -> Tuple[str, str]:
+    """Split the prompt into (instructions, issue payload).
+
+    The instructions are identical for every issue, so handing them to the
+    LLM client as the system message keeps the invariant text at the start
+    of the request where provider-side prefix caching can hit; only the
+    payload varies per call.
     """
-    prompt = make_testcase_prompt(issue, use_json=use_json)
-    response = llm.generate(prompt, max_tokens=3000, structured_json=use_json)
-    
+    return (
+        _JSON_TAIL if use_json else _MARKDOWN_TAIL,
+        _issue_payload(issue.get("key"), issue.get("summary"), issue.get("description")),
+    )
+
+
+@lru_cache(maxsize=512)
+def _issue_payload(
+    key: Optional[str], summary: Optional[str], description: Optional[str]
+) -> str:
+    return (
+        f"Requirement key: {key}\n"
+        f"Summary: {summary}\n"
+        f"Description: {description}\n"
+    )
+
+
+def _parse_testcase_response(response: str, use_json: bool) -> Dict:
+    """Parse the LLM response into the test case dict shape."""
     if use_json:
         try:
-            parsed = json.loads(response)
+            if orjson is not None:
+                parsed = orjson.loads(response)
+            else:
+                parsed = json.loads(response)
             return parsed
-        except json.JSONDecodeError as e:
+        except ValueError as e:  # orjson.JSONDecodeError and json.JSONDecodeError
             # Fallback: return as markdown if JSON parsing fails
             return {
                 "positive_cases": [],
@@ -69,61 +111,99 @@ def generate_testcases(issue: Dict, llm: LLMClient, use_json: bool = True) -> Di
         return {"markdown": response}
 
 
+def generate_testcases(issue: Dict, llm: LLMClient, use_json: bool = True) -> Dict:
+    """Generate test cases, optionally as structured JSON.
+
+    Returns:
+        If use_json=True: dict with keys 'positive_cases', 'negative_cases', 'edge_cases', 'test_data'
+        If use_json=False: dict with key 'markdown' containing markdown text
+    """
+    system, payload = make_testcase_messages(issue, use_json=use_json)
+    response = llm.generate(payload, max_tokens=3000, structured_json=use_json, system=system)
+    return _parse_testcase_response(response, use_json)
+
+
+async def agenerate_testcases(issue: Dict, llm: LLMClient, use_json: bool = True) -> Dict:
+    """Async counterpart of `generate_testcases`, suitable for asyncio.gather."""
+    system, payload = make_testcase_messages(issue, use_json=use_json)
+    response = await llm.agenerate(
+        payload, max_tokens=3000, structured_json=use_json, system=system
+    )
+    return _parse_testcase_response(response, use_json)
+
+
+def _assemble_all(issue: Dict, testcases: Dict) -> Dict:
+    """Build the full per-issue artifact bundle from one test case dict."""
+    markdown = format_testcases_as_markdown(testcases)
+    return {
+        "testcases": testcases,
+        "markdown": markdown,
+        "selenium": generate_selenium_script(issue, markdown),
+        "playwright": generate_playwright_script(issue, markdown),
+    }
+
+
+def generate_all(issue: Dict, llm: LLMClient, use_json: bool = True) -> Dict:
+    """Produce test cases plus both automation skeletons from a single LLM call.
+
+    Only the test case generation hits the API; the Selenium and Playwright
+    skeletons are derived locally, so each issue costs exactly one round-trip.
+
+    Returns:
+        dict with keys 'testcases', 'markdown', 'selenium', 'playwright'
+    """
+    testcases = generate_testcases(issue, llm, use_json=use_json)
+    return _assemble_all(issue, testcases)
+
+
+async def agenerate_all(issue: Dict, llm: LLMClient, use_json: bool = True) -> Dict:
+    """Async counterpart of `generate_all`."""
+    testcases = await agenerate_testcases(issue, llm, use_json=use_json)
+    return _assemble_all(issue, testcases)
+
+
+def _emit_section(parts: List[str], title: str, cases: List[Dict], leading_newline: bool) -> None:
+    """Append one Markdown case section to the output buffer."""
+    if not cases:
+        return
+    parts.append(("\n" if leading_newline else "") + f"## {title}\n")
+    for tc in cases:
+        parts.append(f"\n### {tc.get('id', 'N/A')}: {tc.get('title', 'N/A')}\n")
+        parts.append(f"- **Preconditions**: {tc.get('preconditions', 'N/A')}\n")
+        if tc.get("steps"):
+            parts.append("- **Steps**:\n")
+            for i, step in enumerate(tc["steps"], 1):
+                parts.append(f"  {i}. {step}\n")
+        parts.append(f"- **Expected Result**: {tc.get('expected_result', 'N/A')}\n")
+
+
 def format_testcases_as_markdown(testcases: Dict) -> str:
     """Convert structured test case dict to readable Markdown."""
-    md = "# Test Cases\n\n"
-    
-    # Positive cases
-    if testcases.get("positive_cases"):
-        md += "## Positive Cases\n"
-        for tc in testcases["positive_cases"]:
-            md += f"\n### {tc.get('id', 'N/A')}: {tc.get('title', 'N/A')}\n"
-            md += f"- **Preconditions**: {tc.get('preconditions', 'N/A')}\n"
-            if tc.get("steps"):
-                md += "- **Steps**:\n"
-                for i, step in enumerate(tc["steps"], 1):
-                    md += f"  {i}. {step}\n"
-            md += f"- **Expected Result**: {tc.get('expected_result', 'N/A')}\n"
-    
-    # Negative cases
-    if testcases.get("negative_cases"):
-        md += "\n## Negative Cases\n"
-        for tc in testcases["negative_cases"]:
-            md += f"\n### {tc.get('id', 'N/A')}: {tc.get('title', 'N/A')}\n"
-            md += f"- **Preconditions**: {tc.get('preconditions', 'N/A')}\n"
-            if tc.get("steps"):
-                md += "- **Steps**:\n"
-                for i, step in enumerate(tc["steps"], 1):
-                    md += f"  {i}. {step}\n"
-            md += f"- **Expected Result**: {tc.get('expected_result', 'N/A')}\n"
-    
-    # Edge cases
-    if testcases.get("edge_cases"):
-        md += "\n## Edge Cases\n"
-        for tc in testcases["edge_cases"]:
-            md += f"\n### {tc.get('id', 'N/A')}: {tc.get('title', 'N/A')}\n"
-            md += f"- **Preconditions**: {tc.get('preconditions', 'N/A')}\n"
-            if tc.get("steps"):
-                md += "- **Steps**:\n"
-                for i, step in enumerate(tc["steps"], 1):
-                    md += f"  {i}. {step}\n"
-            md += f"- **Expected Result**: {tc.get('expected_result', 'N/A')}\n"
-    
+    # Build into a list and join once; repeated += on str is quadratic
+    parts: List[str] = ["# Test Cases\n\n"]
+
+    _emit_section(parts, "Positive Cases", testcases.get("positive_cases"), leading_newline=False)
+    _emit_section(parts, "Negative Cases", testcases.get("negative_cases"), leading_newline=True)
+    _emit_section(parts, "Edge Cases", testcases.get("edge_cases"), leading_newline=True)
+
     # Test data
     if testcases.get("test_data"):
-        md += "\n## Test Data\n"
+        parts.append("\n## Test Data\n")
         for key, val in testcases["test_data"].items():
-            md += f"- **{key}**: {val}\n"
-    
+            parts.append(f"- **{key}**: {val}\n")
+
     # Include raw markdown if parsing had errors
     if testcases.get("raw_markdown"):
-        md += f"\n## Raw LLM Output\n```\n{testcases['raw_markdown']}\n```\n"
-    
-    return md
+        parts.append(f"\n## Raw LLM Output\n```\n{testcases['raw_markdown']}\n```\n")
+
+    return "".join(parts)
 
 def generate_selenium_script(issue: Dict, testcase_markdown: str) -> str:
     # Simple skeleton: uses pytest + selenium webdriver
-    name = issue.get("key", "ISSUE")
+    return _selenium_skeleton(issue.get("key", "ISSUE"))
+
+@lru_cache(maxsize=512)
+def _selenium_skeleton(name: str) -> str:
     return f"""
 import pytest
 from selenium import webdriver
@@ -140,7 +220,10 @@ def test_{name.lower().replace('-', '_')}_smoke():
 """
 
 def generate_playwright_script(issue: Dict, testcase_markdown: str) -> str:
-    name = issue.get("key", "ISSUE")
+    return _playwright_skeleton(issue.get("key", "ISSUE"))
+
+@lru_cache(maxsize=512)
+def _playwright_skeleton(name: str) -> str:
     return f"""
 from playwright.sync_api import sync_playwright
 
@@ -1,6 +1,23 @@
+import atexit
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+# Shared session so repeated fetches reuse pooled TCP/TLS connections
+# instead of paying a fresh handshake per issue.
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    ),
+)
+atexit.register(_session.close)
+
 
 def fetch_issue(issue_key: str) -> dict:
     """Fetch a Jira issue by key and return a small normalized dict.
@@ -14,7 +31,12 @@ def fetch_issue(issue_key: str) -> dict:
         raise RuntimeError("Set JIRA_BASE_URL, JIRA_USER, JIRA_API_TOKEN in environment")
 
     url = f"{base.rstrip('/')}/rest/api/2/issue/{issue_key}"
-    resp = requests.get(url, auth=HTTPBasicAuth(user, token), headers={"Accept": "application/json"})
+    resp = _session.get(
+        url,
+        auth=HTTPBasicAuth(user, token),
+        headers={"Accept": "application/json"},
+        timeout=10,
+    )
     resp.raise_for_status()
     data = resp.json()
     fields = data.get("fields", {})
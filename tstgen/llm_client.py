@@ -1,10 +1,35 @@
 import os
+import random
+import re
 import time
+import asyncio
+import functools
+import hashlib
 import json
 import logging
-from typing import Optional, Dict, Any
-from functools import wraps
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict
+from typing import Optional, Dict, Any, FrozenSet
+import httpx
 import openai
+
+try:
+    import tiktoken  # exact BPE token counts; optional
+except ImportError:
+    tiktoken = None
+
+try:
+    import orjson  # ~3-5x faster JSON parsing; optional
+except ImportError:
+    orjson = None
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+)
 from .cache import ResponseCache
 
 logger = logging.getLogger(__name__)
@@ -17,7 +42,7 @@ class RateLimitError(Exception):
 
 class LLMClient:
     """Enhanced OpenAI wrapper with retry logic, caching, and rate limit awareness.
-    
+
     Features:
     - Automatic retry with exponential backoff for transient errors
     - Response caching to reduce API calls
@@ -25,6 +50,7 @@ class LLMClient:
     - Rate limit tracking and awareness
     - Proper timeout handling
     - Token estimation for cost tracking
+    - Sync (`generate`) and async (`agenerate`) call paths sharing one cache
     """
 
     def __init__(
@@ -35,35 +61,135 @@ class LLMClient:
         cache_ttl_hours: int = 24,
         max_retries: int = 3,
         timeout: int = 30,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        cache_fuzzy: bool = False,
+        fuzzy_threshold: float = 0.85,
     ):
         key = api_key or os.getenv("OPENAI_API_KEY")
         if not key:
             raise RuntimeError("Set OPENAI_API_KEY in environment to use LLM features")
 
-        openai.api_key = key
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.max_retries = max_retries
         self.timeout = timeout
-        
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        # v1 SDK clients; retries are handled by our own backoff loop.
+        # Both clients share pooled httpx transports so repeated calls reuse
+        # warm TLS connections instead of paying a handshake each.
+        limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        http_timeout = httpx.Timeout(float(timeout), connect=5.0)
+        try:
+            # HTTP/2 multiplexes calls over one connection when h2 is installed
+            self._http = httpx.Client(http2=True, limits=limits, timeout=http_timeout)
+        except ImportError:
+            self._http = httpx.Client(limits=limits, timeout=http_timeout)
+        self._http_async = httpx.AsyncClient(limits=limits, timeout=http_timeout)
+        self.client = openai.OpenAI(api_key=key, http_client=self._http, max_retries=0)
+        self.aclient = openai.AsyncOpenAI(
+            api_key=key, http_client=self._http_async, max_retries=0
+        )
+
+        # Token counting: exact BPE when tiktoken is installed, chars/4 otherwise.
+        # The same prompts get re-estimated for cost reporting, so memoize.
+        self._enc = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self._enc = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._enc = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # First use downloads the BPE vocab, which fails offline;
+                # degrade to the chars/4 heuristic rather than refusing
+                # to construct at all
+                logger.warning(f"tiktoken unavailable ({e}); using char-based token estimate")
+                self._enc = None
+        self._estimate_tokens = functools.lru_cache(maxsize=256)(self._count_tokens)
+
         # Caching
         self.cache = ResponseCache(cache_dir=".cache", ttl_hours=cache_ttl_hours) if cache_enabled else None
-        
-        # Rate limit tracking
+
+        # Optional fuzzy layer: near-duplicate prompts (reworded templates)
+        # reuse an existing entry when Jaccard similarity over normalized
+        # tokens clears the threshold. Off by default since near-duplicates
+        # are not always answer-equivalent.
+        self.cache_fuzzy = cache_fuzzy
+        self.fuzzy_threshold = fuzzy_threshold
+        self._fuzzy_prompts: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._fuzzy_max = 200
+        # Sync calls record entries from asyncio.to_thread worker threads
+        # while lookups iterate the registry, so guard it like the L1 LRU
+        self._fuzzy_lock = threading.Lock()
+
+        # Bound concurrent async API calls so gather()-style fan-out can't
+        # stampede the provider's rate limits
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "10"))
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight = 0
+
+        # Concurrent identical prompts coalesce onto one API call
+        self._inflight_futures: Dict[str, asyncio.Future] = {}
+
+        # Rate limit tracking. The counters are written from both the event
+        # loop and worker threads (sync calls under asyncio.to_thread), so
+        # increments and snapshots go through a lock; plain += would lose
+        # updates under concurrency.
+        self._usage_lock = threading.Lock()
         self.total_tokens_used = 0
         self.total_api_calls = 0
+        self.total_retries = 0
         self.rate_limit_reset_at = None
-        
+
         logger.info(f"LLMClient initialized with model={self.model}, cache_enabled={cache_enabled}")
 
-    def _estimate_tokens(self, text: str) -> int:
-        """Rough token estimation (1 token ≈ 4 chars for English)."""
+    def _count_tokens(self, text: str) -> int:
+        """Token count: exact BPE pass, or ~1 token per 4 chars as fallback."""
+        if self._enc is not None:
+            return len(self._enc.encode(text, disallowed_special=()))
         return len(text) // 4
 
-    def _handle_rate_limit_error(self, retry_after: Optional[int] = None) -> None:
+    @staticmethod
+    def _parse_retry_after(value: Optional[str], server_date: Optional[str] = None) -> Optional[float]:
+        """Parse a retry-after header value into seconds.
+
+        Accepts both delta-seconds (possibly fractional) and RFC 7231
+        HTTP-dates. Dates are measured against the server's own Date header
+        when present, so local clock drift can't inflate or zero the wait.
+        """
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            target = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        reference = None
+        if server_date:
+            try:
+                reference = parsedate_to_datetime(server_date)
+            except (TypeError, ValueError):
+                reference = None
+        if reference is None:
+            reference = datetime.now(timezone.utc)
+        return (target - reference).total_seconds()
+
+    def _handle_rate_limit_error(
+        self, retry_after: Optional[str] = None, server_date: Optional[str] = None
+    ) -> None:
         """Handle rate limit error and set reset time."""
-        reset_seconds = retry_after or 60
-        self.rate_limit_reset_at = time.time() + reset_seconds
-        logger.warning(f"Rate limit hit. Reset at {self.rate_limit_reset_at}")
+        parsed = self._parse_retry_after(retry_after, server_date)
+        # Clamp so a malformed header can't make us sleep for days (or not at all)
+        reset_seconds = 60.0 if parsed is None else max(0.0, min(120.0, parsed))
+        # Monotonic deadline: wall-clock jumps (NTP syncs) can't shrink or
+        # invert the wait window
+        self.rate_limit_reset_at = time.monotonic() + reset_seconds
+        logger.warning(f"Rate limit hit. Reset in {reset_seconds:.1f}s")
 
     def generate(
         self,
@@ -72,148 +198,708 @@ class LLMClient:
         max_tokens: int = 2000,
         use_cache: bool = True,
         structured_json: bool = False,
+        system: Optional[str] = None,
     ) -> str:
         """Generate text from prompt with retry logic and caching.
-        
+
         Args:
             prompt: The user prompt
             temperature: Sampling temperature (0.0 - 2.0)
             max_tokens: Max output tokens
             use_cache: Whether to use cached responses
             structured_json: If True, request JSON output and validate
-            
+            system: Invariant instruction text, sent as a leading system
+                message so the provider can prefix-cache it across calls
+
         Returns:
             Generated text or JSON string
         """
         # Check cache first
         if use_cache and self.cache:
-            cached = self.cache.get(prompt, self.model)
+            cached = self.cache.get_by_key(self._cache_key(prompt, structured_json, system))
             if cached:
                 logger.info("Cache hit for prompt")
                 return cached
+            if self.cache_fuzzy:
+                cached = self._fuzzy_get(prompt)
+                if cached:
+                    return cached
 
         # Check if we're rate-limited and need to wait
-        if self.rate_limit_reset_at and time.time() < self.rate_limit_reset_at:
-            wait_time = self.rate_limit_reset_at - time.time()
+        now = time.monotonic()
+        if self.rate_limit_reset_at and now < self.rate_limit_reset_at:
+            wait_time = self.rate_limit_reset_at - now
             logger.info(f"Rate limit in effect. Waiting {wait_time:.1f}s")
             time.sleep(wait_time + 1)
             self.rate_limit_reset_at = None
 
-        # Retry logic with exponential backoff
-        for attempt in range(self.max_retries):
-            try:
+        # Retry transient failures with jittered exponential backoff
+        for attempt in self._retrying():
+            with attempt:
                 return self._call_api(
-                    prompt, temperature, max_tokens, structured_json, use_cache
+                    prompt, temperature, max_tokens, structured_json, use_cache, system
                 )
-            except RateLimitError as e:
-                if attempt == self.max_retries - 1:
-                    raise
-                # Exponential backoff: 2s, 4s, 8s
-                backoff = 2 ** (attempt + 1)
-                logger.warning(f"Rate limit hit. Backing off {backoff}s (attempt {attempt + 1}/{self.max_retries})")
-                time.sleep(backoff)
-            except openai.error.APIError as e:
-                if "timeout" in str(e).lower():
-                    if attempt == self.max_retries - 1:
-                        raise
-                    backoff = 2 ** (attempt + 1)
-                    logger.warning(f"API timeout. Backing off {backoff}s (attempt {attempt + 1}/{self.max_retries})")
-                    time.sleep(backoff)
-                else:
-                    raise
 
-    def _call_api(
+    async def agenerate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        structured_json: bool = False,
+        system: Optional[str] = None,
+    ) -> str:
+        """Async counterpart of `generate`; safe to gather for parallel calls."""
+        if use_cache and self.cache:
+            cached = self.cache.get_by_key(self._cache_key(prompt, structured_json, system))
+            if cached:
+                logger.info("Cache hit for prompt")
+                return cached
+            if self.cache_fuzzy:
+                cached = self._fuzzy_get(prompt)
+                if cached:
+                    return cached
+
+        # Coalesce with an identical request already in flight: both would
+        # miss the cache before either finishes, so the second awaits the
+        # first instead of paying for a duplicate API call.
+        key = self._cache_key(prompt, structured_json, system)
+        existing = self._inflight_futures.get(key)
+        if existing is not None:
+            logger.info("Coalescing onto in-flight identical prompt")
+            return await existing
+
+        fut = asyncio.get_running_loop().create_future()
+        # Retrieve the exception in a callback so abandoned futures don't
+        # log "exception was never retrieved"; waiters still receive it.
+        fut.add_done_callback(
+            lambda f: f.exception() if not f.cancelled() else None
+        )
+        self._inflight_futures[key] = fut
+        try:
+            result = await self._agenerate_uncoalesced(
+                prompt, temperature, max_tokens, structured_json, use_cache, system
+            )
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            self._inflight_futures.pop(key, None)
+            # Leader cancellation (e.g. client disconnect) bypasses the
+            # except clause above; cancel the shared future so followers
+            # wake instead of awaiting a forever-pending result.
+            if not fut.done():
+                fut.cancel()
+
+    @staticmethod
+    def _loads(content: str):
+        """Parse JSON with orjson when installed; ValueError covers both
+        orjson.JSONDecodeError and json.JSONDecodeError."""
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+
+    def generate_json(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+    ) -> Dict:
+        """Generate and return parsed JSON in one pass.
+
+        Callers that need the dict anyway save a second full parse of the
+        response bytes; validation failures raise ValueError instead of
+        being logged and handed back as text.
+        """
+        return self._loads(
+            self.generate(
+                prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                use_cache=use_cache,
+                structured_json=True,
+            )
+        )
+
+    async def agenerate_json(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+    ) -> Dict:
+        """Async counterpart of `generate_json`."""
+        return self._loads(
+            await self.agenerate(
+                prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                use_cache=use_cache,
+                structured_json=True,
+            )
+        )
+
+    async def agenerate_many(
+        self,
+        prompts: list,
+        temperature: float = 0.2,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        structured_json: bool = False,
+    ) -> list:
+        """Generate responses for many prompts concurrently.
+
+        Round-trips overlap under the concurrency semaphore, so total time
+        approaches the slowest call rather than the sum. Failures come back
+        in-place as exceptions so one bad prompt doesn't sink the batch.
+
+        Returns:
+            List aligned with `prompts`; each item is the generated string
+            or the exception that call raised.
+        """
+        # Resolve cache hits in a synchronous pre-pass: hits then never
+        # spawn a coroutine nor wait out a rate-limit window.
+        results: list = [None] * len(prompts)
+        misses = []
+        for i, p in enumerate(prompts):
+            cached = (
+                self.cache.get_by_key(self._cache_key(p, structured_json))
+                if (use_cache and self.cache)
+                else None
+            )
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.append(i)
+
+        if misses:
+            fetched = await asyncio.gather(
+                *(
+                    self.agenerate(
+                        prompts[i],
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        use_cache=use_cache,
+                        structured_json=structured_json,
+                    )
+                    for i in misses
+                ),
+                return_exceptions=True,
+            )
+            for i, r in zip(misses, fetched):
+                results[i] = r
+        return results
+
+    _BATCH_HEADER = (
+        "Answer each of the numbered tasks below independently. "
+        "Return ONLY valid JSON of the form {\"answers\": [\"<answer to task 1>\", "
+        "\"<answer to task 2>\", ...]} with exactly one string per task, in order.\n"
+    )
+
+    def generate_batch(
+        self,
+        prompts: list,
+        temperature: float = 0.2,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+    ) -> list:
+        """Answer several prompts with a single chat completion.
+
+        The chat endpoint takes one conversation per request, so the prompts
+        are packed into a numbered-task message and the model returns a JSON
+        array of answers. One round-trip amortizes HTTP and queueing
+        overhead across all items; each answer is cached under its own
+        prompt key so later singleton calls still hit.
+
+        Returns:
+            List aligned with `prompts`; unanswered items are None.
+        """
+        results: list = [None] * len(prompts)
+        misses = []
+        for i, p in enumerate(prompts):
+            cached = self.cache.get_by_key(self._cache_key(p)) if (use_cache and self.cache) else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.append(i)
+        if not misses:
+            return results
+
+        combined = self._BATCH_HEADER + "".join(
+            f"\nTask {n}:\n{prompts[i]}\n" for n, i in enumerate(misses, 1)
+        )
+        # Sub-results are cached individually below; don't cache the bundle
+        response = self.generate(
+            combined,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=False,
+            structured_json=True,
+        )
+        try:
+            answers = self._loads(response).get("answers", [])
+        except ValueError:
+            logger.error("Batch response was not the expected JSON shape")
+            return results
+
+        for idx, answer in zip(misses, answers):
+            if not isinstance(answer, str):
+                continue
+            results[idx] = answer
+            if use_cache and self.cache:
+                self.cache.set_by_key(self._cache_key(prompts[idx]), self.model, answer)
+        return results
+
+    _WS_RE = re.compile(r"\s+")
+
+    def _cache_key(
+        self, prompt: str, structured_json: bool = False, system: Optional[str] = None
+    ) -> str:
+        """16-byte BLAKE2b digest of (model, JSON-mode flag, system, prompt).
+
+        Whitespace runs are collapsed before hashing so prompts differing
+        only in formatting share a key. The structured_json flag and the
+        system message are part of the key because both change what the
+        model sees. Handed to the cache and the in-flight registry so
+        neither has to re-hash or hold the full prompt text.
+        """
+        normalized = self._WS_RE.sub(" ", prompt).strip()
+        normalized_system = self._WS_RE.sub(" ", system).strip() if system else ""
+        return hashlib.blake2b(
+            f"{self.model}\x00{int(structured_json)}\x00{normalized_system}\x00".encode("utf-8")
+            + normalized.encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+
+    def _prompt_tokens(self, prompt: str) -> FrozenSet[str]:
+        """Lowercased, whitespace-split token set for similarity scoring."""
+        return frozenset(self._WS_RE.sub(" ", prompt).strip().lower().split())
+
+    def _fuzzy_get(self, prompt: str) -> Optional[str]:
+        """Look up a cached response for a near-duplicate prompt.
+
+        Scores Jaccard similarity over normalized token sets against the
+        last ~200 cached prompts; embeddings would catch paraphrases too,
+        but a token-set overlap is free and covers the common case of
+        lightly reworded issue templates. Returns None below the threshold.
+        """
+        tokens = self._prompt_tokens(prompt)
+        if not tokens:
+            return None
+        best_key = None
+        best_score = 0.0
+        with self._fuzzy_lock:
+            for key, candidate in self._fuzzy_prompts.items():
+                intersection = len(tokens & candidate)
+                if not intersection:
+                    continue
+                score = intersection / len(tokens | candidate)
+                if score > best_score:
+                    best_score = score
+                    best_key = key
+        if best_key is None or best_score < self.fuzzy_threshold:
+            return None
+        hit = self.cache.get_by_key(best_key)
+        if hit:
+            logger.info(f"Fuzzy cache hit (Jaccard {best_score:.2f})")
+        return hit
+
+    def _fuzzy_record(self, key: str, prompt: str) -> None:
+        """Remember a cached prompt's token set for later fuzzy lookups."""
+        if not self.cache_fuzzy:
+            return
+        tokens = self._prompt_tokens(prompt)
+        with self._fuzzy_lock:
+            self._fuzzy_prompts[key] = tokens
+            self._fuzzy_prompts.move_to_end(key)
+            while len(self._fuzzy_prompts) > self._fuzzy_max:
+                self._fuzzy_prompts.popitem(last=False)
+
+    async def _agenerate_uncoalesced(
         self,
         prompt: str,
         temperature: float,
         max_tokens: int,
         structured_json: bool,
         use_cache: bool,
+        system: Optional[str] = None,
     ) -> str:
-        """Internal API call with error handling."""
-        try:
-            # Build the request
-            messages = [{"role": "user", "content": prompt}]
-            
-            # If structured JSON requested, add instruction
-            if structured_json:
-                messages[0]["content"] += (
-                    "\n\nIMPORTANT: Return output as valid JSON only. "
-                    "Do not include markdown code blocks or any text outside the JSON."
+        """Rate-limit wait plus retry loop, without cache or coalescing."""
+        now = time.monotonic()
+        if self.rate_limit_reset_at and now < self.rate_limit_reset_at:
+            wait_time = self.rate_limit_reset_at - now
+            logger.info(f"Rate limit in effect. Waiting {wait_time:.1f}s")
+            await asyncio.sleep(wait_time + 1)
+            self.rate_limit_reset_at = None
+
+        async for attempt in self._aretrying():
+            with attempt:
+                return await self._acall_api(
+                    prompt, temperature, max_tokens, structured_json, use_cache, system
                 )
 
-            resp = openai.ChatCompletion.create(
+    # One entry per provider error class: (retry?, backoff multiplier).
+    # A dict keeps classification to a single lookup and makes adding a new
+    # error class (or provider) a one-line change instead of a new branch.
+    # Everything absent from the table propagates immediately.
+    _RETRY_TABLE = {
+        RateLimitError: (True, 1.0),
+        openai.APITimeoutError: (True, 1.0),
+        openai.APIConnectionError: (True, 1.0),
+        openai.InternalServerError: (True, 2.0),  # 5xx: back off harder
+        openai.AuthenticationError: (False, 0.0),
+    }
+
+    @classmethod
+    def _classify_error(cls, exc: BaseException) -> tuple:
+        """Look up (should_retry, backoff multiplier) for an exception."""
+        entry = cls._RETRY_TABLE.get(type(exc))
+        if entry is not None:
+            return entry
+        for etype, entry in cls._RETRY_TABLE.items():
+            if isinstance(exc, etype):
+                return entry
+        return (False, 1.0)
+
+    def _should_retry(self, exc: BaseException) -> bool:
+        return self._classify_error(exc)[0]
+
+    def _retry_wait(self, retry_state) -> float:
+        """Full-jitter exponential backoff scaled by the error's multiplier."""
+        _, multiplier = self._classify_error(retry_state.outcome.exception())
+        bound = min(
+            self.max_delay,
+            self.base_delay * multiplier * (2 ** (retry_state.attempt_number - 1)),
+        )
+        return random.uniform(0, bound)
+
+    def _before_retry_sleep(self, retry_state) -> None:
+        """Count retries and log the upcoming backoff."""
+        with self._usage_lock:
+            self.total_retries += 1
+        logger.warning(
+            f"Transient API error: {retry_state.outcome.exception()!r}. "
+            f"Backing off {retry_state.next_action.sleep:.1f}s "
+            f"(attempt {retry_state.attempt_number}/{self.max_retries})"
+        )
+
+    def _retry_policy(self) -> dict:
+        # Full jitter: sleep ~ uniform(0, min(max_delay, mult * base * 2**n)),
+        # so concurrent workers hitting a 429 don't wake in lockstep
+        return dict(
+            stop=stop_after_attempt(self.max_retries),
+            wait=self._retry_wait,
+            retry=retry_if_exception(self._should_retry),
+            before_sleep=self._before_retry_sleep,
+            reraise=True,
+        )
+
+    def _retrying(self) -> Retrying:
+        return Retrying(**self._retry_policy())
+
+    def _aretrying(self) -> AsyncRetrying:
+        return AsyncRetrying(**self._retry_policy())
+
+    def generate_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        structured_json: bool = False,
+        system: Optional[str] = None,
+    ):
+        """Sync counterpart of `astream` for CLI-style callers.
+
+        Yields content chunks as they arrive; the joined result is
+        validated and cached once the stream ends.
+        """
+        if use_cache and self.cache:
+            cached = self.cache.get_by_key(self._cache_key(prompt, structured_json, system))
+            if cached:
+                logger.info("Cache hit for prompt")
+                yield cached
+                return
+
+        try:
+            stream = self.client.chat.completions.create(
                 model=self.model,
-                messages=messages,
+                messages=self._build_messages(prompt, structured_json, system),
                 temperature=temperature,
                 max_tokens=max_tokens,
-                timeout=self.timeout,
+                stream=True,
+                **self._completion_kwargs(structured_json),
             )
+            parts = []
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except openai.OpenAIError as e:
+            self._wrap_api_error(e)
+            return
 
-            # Extract and validate response
-            choices = resp.get("choices", [])
-            if not choices:
-                raise RuntimeError("No choices in API response")
+        self._finish_stream(prompt, parts, structured_json, use_cache, system)
 
-            content = choices[0].get("message", {}).get("content", "").strip()
+    def _finish_stream(
+        self,
+        prompt: str,
+        parts: list,
+        structured_json: bool,
+        use_cache: bool,
+        system: Optional[str] = None,
+    ) -> None:
+        """Account for, validate and cache a fully-consumed stream."""
+        content = "".join(parts).strip()
+        # Streamed responses carry no usage block; fall back to estimation
+        estimated = self._estimate_tokens(prompt) + self._estimate_tokens(content)
+        with self._usage_lock:
+            self.total_api_calls += 1
+            self.total_tokens_used += estimated
 
-            # Track usage
-            usage = resp.get("usage", {})
-            prompt_tokens = usage.get("prompt_tokens", 0)
-            completion_tokens = usage.get("completion_tokens", 0)
+        if structured_json:
+            try:
+                self._loads(content)
+            except ValueError as e:
+                # Too late to retry mid-stream; surface in the logs only
+                logger.error(f"Invalid JSON in streamed response: {e}")
+                return
+
+        if use_cache and self.cache and content:
+            key = self._cache_key(prompt, structured_json, system)
+            self.cache.set_by_key(key, self.model, content)
+            self._fuzzy_record(key, prompt)
+
+    async def astream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        structured_json: bool = False,
+        system: Optional[str] = None,
+    ):
+        """Stream response deltas as they arrive.
+
+        Yields content chunks so callers can overlap downstream work (or
+        surface tokens to the client) while generation is still running.
+        The joined result is validated and cached once the stream ends.
+        """
+        if use_cache and self.cache:
+            cached = self.cache.get_by_key(self._cache_key(prompt, structured_json, system))
+            if cached:
+                logger.info("Cache hit for prompt")
+                yield cached
+                return
+
+        try:
+            async with self._sem:
+                self._in_flight += 1
+                try:
+                    stream = await self.aclient.chat.completions.create(
+                        model=self.model,
+                        messages=self._build_messages(prompt, structured_json, system),
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        **self._completion_kwargs(structured_json),
+                    )
+                    parts = []
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                finally:
+                    self._in_flight -= 1
+        except openai.OpenAIError as e:
+            self._wrap_api_error(e)
+            return
+
+        self._finish_stream(prompt, parts, structured_json, use_cache, system)
+
+    # Fixed system message for JSON mode, built once and shared by every
+    # call (never mutated). Keeping the invariant text in a stable leading
+    # message also lets provider-side prefix caching hash it.
+    _JSON_SYSTEM = {
+        "role": "system",
+        "content": "Return only valid JSON, no markdown, no prose.",
+    }
+
+    def _build_messages(
+        self, prompt: str, structured_json: bool, system: Optional[str] = None
+    ) -> list:
+        """Build the chat messages for a prompt.
+
+        Invariant text (JSON directive, then the caller's instruction
+        template) leads and the variable prompt comes last, so OpenAI's
+        automatic prefix caching can reuse the shared head across calls.
+        """
+        messages = []
+        if structured_json:
+            messages.append(self._JSON_SYSTEM)
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _completion_kwargs(self, structured_json: bool) -> dict:
+        """Extra create() kwargs; native JSON mode replaces the old appended
+        "return JSON only" instruction and guarantees syntactic validity at
+        the decoder level."""
+        if structured_json:
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    def _finish_response(
+        self,
+        resp,
+        prompt: str,
+        structured_json: bool,
+        use_cache: bool,
+        system: Optional[str] = None,
+    ) -> str:
+        """Extract content from a completion, track usage, validate and cache."""
+        if not resp.choices:
+            raise RuntimeError("No choices in API response")
+
+        content = (resp.choices[0].message.content or "").strip()
+
+        # Track usage
+        prompt_tokens = resp.usage.prompt_tokens if resp.usage else 0
+        completion_tokens = resp.usage.completion_tokens if resp.usage else 0
+        with self._usage_lock:
             self.total_tokens_used += prompt_tokens + completion_tokens
             self.total_api_calls += 1
 
-            logger.info(
-                f"API call successful. "
-                f"Tokens: +{prompt_tokens + completion_tokens} (total: {self.total_tokens_used}), "
-                f"calls: {self.total_api_calls}"
-            )
+        logger.info(
+            f"API call successful. "
+            f"Tokens: +{prompt_tokens + completion_tokens} (total: {self.total_tokens_used}), "
+            f"calls: {self.total_api_calls}"
+        )
 
-            # Validate JSON if requested
-            if structured_json:
-                try:
-                    json.loads(content)  # Validate it's valid JSON
-                    logger.info("JSON output validated")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON in response: {e}")
-                    raise ValueError(f"LLM returned invalid JSON: {str(e)[:200]}")
+        # Sanity-check JSON if requested; native JSON mode means this should
+        # always pass (truncation at max_tokens is the usual exception), so
+        # a failure is logged rather than burning a retry — but it must not
+        # be cached, or a truncated completion gets served for the full TTL
+        if structured_json:
+            try:
+                self._loads(content)
+                logger.info("JSON output validated")
+            except ValueError as e:
+                logger.warning(f"Invalid JSON in response despite JSON mode: {e}")
+                use_cache = False
 
-            # Cache the response
-            if use_cache and self.cache:
-                self.cache.set(prompt, self.model, content)
+        # Cache the response
+        if use_cache and self.cache:
+            key = self._cache_key(prompt, structured_json, system)
+            self.cache.set_by_key(key, self.model, content)
+            self._fuzzy_record(key, prompt)
 
-            return content
+        return content
 
-        except openai.error.RateLimitError as e:
-            # Extract retry-after header if available
-            retry_after = None
-            if hasattr(e, "http_response"):
-                retry_after = e.http_response.headers.get("retry-after")
-            self._handle_rate_limit_error(retry_after)
+    def _wrap_api_error(self, e: Exception) -> None:
+        """Translate OpenAI errors into our exceptions; re-raise otherwise."""
+        if isinstance(e, openai.RateLimitError):
+            retry_after = server_date = None
+            if getattr(e, "response", None) is not None:
+                retry_after = e.response.headers.get("retry-after")
+                server_date = e.response.headers.get("date")
+            self._handle_rate_limit_error(retry_after, server_date)
             raise RateLimitError(str(e)) from e
-        except openai.error.APIConnectionError as e:
+        if isinstance(e, openai.APIConnectionError):
             logger.error(f"API connection error: {e}")
-            raise
-        except openai.error.AuthenticationError as e:
+        elif isinstance(e, openai.AuthenticationError):
             logger.error(f"Authentication error: {e}")
-            raise
+        raise e
+
+    def _call_api(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        structured_json: bool,
+        use_cache: bool,
+        system: Optional[str] = None,
+    ) -> str:
+        """Internal API call with error handling."""
+        try:
+            resp = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(prompt, structured_json, system),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **self._completion_kwargs(structured_json),
+            )
+            return self._finish_response(resp, prompt, structured_json, use_cache, system)
+        except openai.OpenAIError as e:
+            self._wrap_api_error(e)
+
+    async def _acall_api(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        structured_json: bool,
+        use_cache: bool,
+        system: Optional[str] = None,
+    ) -> str:
+        """Internal async API call with error handling."""
+        try:
+            async with self._sem:
+                self._in_flight += 1
+                try:
+                    resp = await self.aclient.chat.completions.create(
+                        model=self.model,
+                        messages=self._build_messages(prompt, structured_json, system),
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **self._completion_kwargs(structured_json),
+                    )
+                finally:
+                    self._in_flight -= 1
+            return self._finish_response(resp, prompt, structured_json, use_cache, system)
+        except openai.OpenAIError as e:
+            self._wrap_api_error(e)
 
     def get_rate_limit_status(self) -> Dict[str, Any]:
         """Get current rate limit and usage status."""
-        is_rate_limited = self.rate_limit_reset_at and time.time() < self.rate_limit_reset_at
+        now = time.monotonic()
+        is_rate_limited = self.rate_limit_reset_at and now < self.rate_limit_reset_at
         reset_in = None
         if self.rate_limit_reset_at:
-            reset_in = max(0, self.rate_limit_reset_at - time.time())
+            reset_in = max(0, self.rate_limit_reset_at - now)
+
+        with self._usage_lock:
+            total_api_calls = self.total_api_calls
+            total_tokens_used = self.total_tokens_used
+            total_retries = self.total_retries
 
         return {
             "model": self.model,
-            "total_api_calls": self.total_api_calls,
-            "total_tokens_used": self.total_tokens_used,
+            "total_api_calls": total_api_calls,
+            "total_tokens_used": total_tokens_used,
+            "total_retries": total_retries,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
             "is_rate_limited": is_rate_limited,
             "rate_limit_resets_in_seconds": reset_in,
         }
 
+    def close(self) -> None:
+        """Release the sync HTTP connection pool."""
+        self._http.close()
+
+    async def aclose(self) -> None:
+        """Release both HTTP connection pools; call on application shutdown."""
+        self._http.close()
+        await self._http_async.aclose()
+
     def clear_cache(self) -> None:
         """Clear all cached responses."""
         if self.cache:
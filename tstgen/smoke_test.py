@@ -1,20 +1,26 @@
+import asyncio
 from pathlib import Path
 from tstgen.generator import generate_selenium_script, generate_playwright_script
 
 
-def run():
+async def run():
     issue = {"key": "SMOKE-1", "summary": "Smoke test summary", "description": "Smoke test description"}
     selenium = generate_selenium_script(issue, "")
     playwright = generate_playwright_script(issue, "")
 
     out = Path.cwd() / "outputs" / "smoke-test"
     out.mkdir(parents=True, exist_ok=True)
-    (out / "smoke.selenium.py").write_text(selenium, encoding="utf-8")
-    (out / "smoke.playwright.py").write_text(playwright, encoding="utf-8")
+    sel_path = out / "smoke.selenium.py"
+    pw_path = out / "smoke.playwright.py"
+    # Overlap the two blocking writes instead of serializing them
+    await asyncio.gather(
+        asyncio.to_thread(sel_path.write_text, selenium, "utf-8"),
+        asyncio.to_thread(pw_path.write_text, playwright, "utf-8"),
+    )
 
-    print("Wrote:", out / "smoke.selenium.py")
-    print("Wrote:", out / "smoke.playwright.py")
+    print("Wrote:", sel_path)
+    print("Wrote:", pw_path)
 
 
 if __name__ == '__main__':
-    run()
+    asyncio.run(run())